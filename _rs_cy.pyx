@@ -0,0 +1,51 @@
+# cython: language_level=3
+# Noyau R/S compilé, chargé par risk_core via pyximport si Cython est installé
+
+cimport cython
+from cython cimport floating
+from libc.math cimport sqrt
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef double _rs(const floating[::1] x, Py_ssize_t w) noexcept nogil:
+    # R/S moyen sur les segments de taille w (0.0 si aucun segment valide)
+    cdef Py_ssize_t n_seg = x.shape[0] // w
+    cdef Py_ssize_t i, j, k, start
+    cdef double mean, m2, d, var, y, ymin, ymax
+    cdef double total = 0.0
+    cdef Py_ssize_t count = 0
+
+    for i in range(n_seg):
+        start = i * w
+        # moyenne et variance de Welford
+        mean = 0.0
+        m2 = 0.0
+        for k in range(w):
+            d = x[start + k] - mean
+            mean += d / (k + 1)
+            m2 += d * (x[start + k] - mean)
+        var = m2 / w
+        # segment constant : même seuil relatif que risk_core._VAR_RTOL
+        if var <= 1e-12 * (var + mean * mean):
+            continue
+        y = x[start] - mean
+        ymin = y
+        ymax = y
+        for j in range(start + 1, start + w):
+            y += x[j] - mean
+            if y < ymin:
+                ymin = y
+            elif y > ymax:
+                ymax = y
+        total += (ymax - ymin) / sqrt(var)
+        count += 1
+    return total / count if count > 0 else 0.0
+
+
+def rs_for_window(const floating[::1] x, Py_ssize_t w):
+    cdef double r
+    with nogil:
+        r = _rs(x, w)
+    return r
@@ -7,6 +7,7 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 from risk_core import detect_risk_factors
+from data_cache import load_cached_data, save_cached_data
 
 def analyze_stock(ticker: str, period: str = "2y"):
     """
@@ -20,15 +21,20 @@ def analyze_stock(ticker: str, period: str = "2y"):
     print("=" * 60)
     
     try:
-        # Download stock data
-        stock = yf.Ticker(ticker)
-        data = stock.history(period=period)
-        
-        if data.empty:
-            print(f"❌ No data found for {ticker}")
-            return
-        
-        print(f"📊 Downloaded {len(data)} days of data")
+        # Download stock data (reusing a recent cached copy if available)
+        data = load_cached_data(ticker, period)
+        if data is None:
+            stock = yf.Ticker(ticker)
+            data = stock.history(period=period, actions=False, auto_adjust=False, prepost=False)
+            
+            if data.empty:
+                print(f"❌ No data found for {ticker}")
+                return
+            
+            save_cached_data(ticker, period, data)
+            print(f"📊 Downloaded {len(data)} days of data")
+        else:
+            print(f"📊 Loaded {len(data)} days of cached data")
         print(f"📅 Date range: {data.index[0].strftime('%Y-%m-%d')} to {data.index[-1].strftime('%Y-%m-%d')}")
         
         # Calculate returns
@@ -44,7 +50,7 @@ def analyze_stock(ticker: str, period: str = "2y"):
         
         # Run risk detection
         print(f"\n⚠️  Risk Factor Analysis:")
-        risk_results = detect_risk_factors(returns)
+        risk_results = detect_risk_factors(returns.to_numpy(dtype=np.float32))
         
         print(f"   Entropy: {risk_results['entropy']:.4f}")
         print(f"   Mutual Information: {risk_results['mi_norm']:.4f}")
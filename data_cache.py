@@ -0,0 +1,55 @@
+"""
+On-disk cache of downloaded stock data, so repeated runs skip the network
+"""
+
+import os
+import re
+import time
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".yf_cache")
+CACHE_EXPIRY_SECONDS = 12 * 60 * 60  # 12 hours
+
+def _cache_path(ticker: str, period: str) -> str:
+    # Keep file names safe for tickers such as 'BRK-B' or '^GSPC'
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{ticker.upper()}_{period}")
+    return os.path.join(CACHE_DIR, f"{name}.pkl")
+
+def load_cached_data(ticker: str, period: str) -> pd.DataFrame:
+    """
+    Load cached stock data if it exists and has not expired
+
+    Args:
+        ticker: Stock ticker symbol
+        period: Time period the data was downloaded for
+
+    Returns:
+        Cached DataFrame, or None if missing, expired or unreadable
+    """
+    path = _cache_path(ticker, period)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_EXPIRY_SECONDS:
+            return None
+        return pd.read_pickle(path)
+    except Exception:
+        return None
+
+def save_cached_data(ticker: str, period: str, data: pd.DataFrame) -> None:
+    """
+    Store downloaded stock data in the cache (failures are ignored)
+
+    Args:
+        ticker: Stock ticker symbol
+        period: Time period the data was downloaded for
+        data: DataFrame to cache
+    """
+    if data is None or data.empty:
+        return
+    path = _cache_path(ticker, period)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        data.to_pickle(tmp_path)
+        os.replace(tmp_path, path)  # atomic, readers never see a partial file
+    except Exception as e:
+        print(f"Could not cache data for {ticker}: {e}")
@@ -4,6 +4,7 @@ import yfinance as yf
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 from risk_core import detect_risk_factors
+from data_cache import load_cached_data, save_cached_data
 
 def download_stock_data(ticker: str, period: str = "2y") -> pd.DataFrame:
     """
@@ -16,15 +17,72 @@ def download_stock_data(ticker: str, period: str = "2y") -> pd.DataFrame:
     Returns:
         DataFrame with stock data
     """
+    data = load_cached_data(ticker, period)
+    if data is not None:
+        print(f"Loaded {len(data)} days of cached data for {ticker}")
+        return data
+    
     try:
         stock = yf.Ticker(ticker)
-        data = stock.history(period=period)
+        data = stock.history(period=period, actions=False, auto_adjust=False, prepost=False)
         print(f"Downloaded {len(data)} days of data for {ticker}")
+        save_cached_data(ticker, period, data)
         return data
     except Exception as e:
         print(f"Error downloading data for {ticker}: {e}")
         return None
 
+def download_batch_data(tickers: list, period: str = "2y") -> dict:
+    """
+    Download data for several stocks in a single yfinance request
+    
+    Args:
+        tickers: List of stock ticker symbols
+        period: Time period to download ('1y', '2y', '5y', etc.)
+    
+    Returns:
+        Dictionary mapping each ticker to its DataFrame (None if unavailable)
+    """
+    stock_data = {}
+    for ticker in tickers:
+        cached = load_cached_data(ticker, period)
+        if cached is not None:
+            print(f"Loaded {len(cached)} days of cached data for {ticker}")
+            stock_data[ticker] = cached
+    
+    # Only request the tickers that are not cached
+    tickers = [ticker for ticker in tickers if ticker not in stock_data]
+    if not tickers:
+        return stock_data
+    
+    try:
+        data = yf.download(tickers=" ".join(tickers), period=period,
+                           group_by='ticker', threads=True, progress=False,
+                           actions=False, auto_adjust=False, prepost=False)
+    except Exception as e:
+        print(f"Error downloading data for {', '.join(tickers)}: {e}")
+        stock_data.update({ticker: None for ticker in tickers})
+        return stock_data
+    
+    for ticker in tickers:
+        try:
+            # A single ticker may come back without the ticker column level
+            if isinstance(data.columns, pd.MultiIndex):
+                ticker_data = data[ticker]
+            else:
+                ticker_data = data
+            ticker_data = ticker_data.dropna(subset=['Close'])
+        except KeyError:
+            ticker_data = None
+        if ticker_data is None or ticker_data.empty:
+            print(f"Error downloading data for {ticker}: no data returned")
+            stock_data[ticker] = None
+        else:
+            print(f"Downloaded {len(ticker_data)} days of data for {ticker}")
+            save_cached_data(ticker, period, ticker_data)
+            stock_data[ticker] = ticker_data
+    return stock_data
+
 def calculate_returns(prices: pd.Series) -> np.ndarray:
     """
     Calculate daily returns from price data
@@ -33,26 +91,24 @@ def calculate_returns(prices: pd.Series) -> np.ndarray:
         prices: Series of closing prices
     
     Returns:
-        Array of daily returns
+        Array of daily returns (float32)
     """
     returns = prices.pct_change().dropna()
-    return returns.values
+    return returns.to_numpy(dtype=np.float32)
 
-def analyze_stock_risk(ticker: str, period: str = "2y") -> dict:
+def analyze_stock_risk(ticker: str, data: pd.DataFrame) -> dict:
     """
     Analyze risk factors for a given stock
     
     Args:
         ticker: Stock ticker symbol
-        period: Time period to analyze
+        data: Stock data from download_stock_data or download_batch_data
     
     Returns:
         Dictionary with risk analysis results
     """
     print(f"\n=== Risk Analysis for {ticker} ===")
     
-    # Download stock data
-    data = download_stock_data(ticker, period)
     if data is None:
         return None
     
@@ -173,16 +229,18 @@ def main():
     
     all_results = {}
     
+    # Download all stocks in one batched request
+    stock_data = download_batch_data(stocks, "2y")
+    
     for stock in stocks:
+        data = stock_data.get(stock)
+        if data is None:
+            continue
         try:
-            results = analyze_stock_risk(stock)
+            results = analyze_stock_risk(stock, data)
             if results:
                 all_results[stock] = results
-                
-                # Download data for plotting
-                data = download_stock_data(stock, "2y")
-                if data is not None:
-                    plot_risk_analysis(stock, results, data)
+                plot_risk_analysis(stock, results, data)
                 
                 print("\n" + "="*50)
         except Exception as e: